@@ -3,11 +3,14 @@ Hangman game, for instructional purposes
 """
 
 from hangman.pics import pics   # pics: lets us use the pics defined in the other file
+import sqlite3                  # sqlite3: so we can tell when the score database will not open
 import subprocess               # subprocess: Gives us the 'say' command
 import time                     # time: let's us delay the action briefly
 
 import click                    # click: provides tools that makes input and output much easier for the programmer
 import hangman.hooks as hangman_hooks
+import hangman.puzzles as hangman_puzzles
+import hangman.scores as hangman_scores
 
 """
 Click is a framework provided by an open source group
@@ -29,6 +32,9 @@ add_option = click.option
 add_argument = click.argument
 
 
+SHOW_SKIPPED = 20   # how many bad puzzle rows to list at the end
+
+
 class HangmanObject(object):
     """
     HangmanObject is the 'obj' in this program, and is passed to the functions
@@ -37,7 +43,7 @@ class HangmanObject(object):
        * gets input from ask_user
     """
 
-    def __init__(self, verbose, sound, player, answer, clue, **kwargs):
+    def __init__(self, verbose, sound, player, answer, clue, database=hangman_scores.DEFAULT_PATH, **kwargs):
         """
         Called at object creation
         """
@@ -46,6 +52,13 @@ class HangmanObject(object):
         self.player_name = player
         self.answer = answer
         self.clue = clue
+        self.database = database
+        self.answer_mask = None  # letters of the answer as bits, see hangman.puzzles.letter_mask
+        self.puzzles = None      # puzzles loaded with --puzzles, played one after another
+        self.skipped_count = 0   # rows of the puzzle file that could not be played
+        self.skipped_rows = []   # the first few of those, to show once the games are over
+        self.score_store = None  # opened the first time a game is saved or a report is made
+        self.scores_failed = False  # True once the score database would not open
         super().__init__(**kwargs)
 
     def echo(self, s, **kwargs):
@@ -84,12 +97,60 @@ class HangmanObject(object):
     def pause(self, **kwargs):
         wait_for_any_key(**kwargs)
 
+    @property
+    def scores(self):
+        """
+        The score database, or None if it cannot be opened
+        A problem with saving should never stop the game, so we just warn once
+        """
+        if self.score_store is None and not self.scores_failed:
+            try:
+                self.score_store = hangman_scores.ScoreStore(self.database)
+            except sqlite3.Error as error:
+                self.scores_failed = True
+                self.echo_red("Scores will not be saved ({}): {}".format(self.database, error), err=True)
+                return None
+            click.get_current_context().call_on_close(self.close_scores)
+        return self.score_store
+
+    def close_scores(self):
+        """
+        Waits for the scores to be saved, and says so if any were lost
+        """
+        lost = self.score_store.close()
+        if lost:
+            self.echo_red("{} game(s) could not be saved: {}".format(lost, self.score_store.error), err=True)
+
+    def record_game(self, won):
+        """
+        Saves the finished game, so it shows up in stats and the leaderboard
+        """
+        if self.scores is None:
+            return
+        self.scores.record(self.player_name, self.answer, self.num_errors, self.chosen, won)
+
+    def skip_puzzle_row(self, line_number, reason):
+        """
+        Remembers a bad row of the puzzle file
+        We cannot show it now, because the next game clears the screen
+        Only the first SHOW_SKIPPED are kept, so a huge file cannot fill up memory
+        """
+        self.skipped_count += 1
+        if len(self.skipped_rows) < SHOW_SKIPPED:
+            self.skipped_rows.append("Line {}: {}".format(line_number, reason))
+
     def is_solved(self):
         """
         In order to determine if the player has won
         We use some math, specifically a set operation
         Spaces do not count for the 'answer', so we have to remove them with the String.replace function
+
+        Puzzles from --puzzles were already checked to be only A to Z,
+        so for those we can compare letter masks instead (see hangman.puzzles.letter_mask)
         """
+        if self.answer_mask is not None:
+            return self.answer_mask & ~hangman_puzzles.letter_mask(self.chosen) == 0
+
         answer = self.answer.lower().replace(' ', '')
         chosen = self.chosen.lower()
         answer_set = set(answer)
@@ -102,12 +163,17 @@ class HangmanObject(object):
 @add_option('-ns', '--nosound', default=True, is_flag=True, help="Toggle the sound, default is on")
 @add_option('-h', '--hook', multiple=True)
 @add_option('-s', '--setup', nargs=3)
+@add_option('-p', '--puzzles', type=click.Path(exists=True, dir_okay=False), help="CSV or JSONL file of player, answer, clue rows to play in order")
+@add_option('-db', '--database', default=hangman_scores.DEFAULT_PATH, help="Where finished games are saved")
 @pass_hangman
-def cli(hangman, verbose, nosound, hook, setup):
+def cli(hangman, verbose, nosound, hook, setup, database, puzzles):
     """
     This function is a 'magic' function
     It gets called everytime the program starts
     """
+    if setup and puzzles:
+        raise click.UsageError("Use either --setup for one game or --puzzles for many, not both")
+
     # Creates the hangman object, store it in the 'obj' of our game
     if setup:
         player, answer, clue = setup
@@ -115,7 +181,7 @@ def cli(hangman, verbose, nosound, hook, setup):
         player, answer, clue = (None, None, None)
 
     if not hook:
-        hangman.obj = HangmanObject(verbose=verbose, sound=nosound, player=player, answer=answer, clue=clue)
+        hangman.obj = HangmanObject(verbose=verbose, sound=nosound, player=player, answer=answer, clue=clue, database=database)
     else:
         #from hangman.hooks import SolveHook
         #hangman.obj = type('HangmanObjWHooks', (SolveHook, HangmanObject), {})(verbose=verbose, sound=nosound, hooks=hook, player=player, answer=answer, clue=clue)
@@ -124,7 +190,13 @@ def cli(hangman, verbose, nosound, hook, setup):
         classes = [getattr(hangman_hooks, m) for m in dir(hangman_hooks) if m.endswith('Hook')]
         classes.append(HangmanObject)
         hangman_class = type('HangmanHookedObject', tuple(classes), {})
-        hangman.obj = hangman_class(verbose=verbose, sound=nosound, hooks=hook, player=player, answer=answer, clue=clue)
+        hangman.obj = hangman_class(verbose=verbose, sound=nosound, hooks=hook, player=player, answer=answer, clue=clue, database=database)
+
+    if puzzles:
+        try:
+            hangman.obj.puzzles = hangman_puzzles.load(puzzles, on_error=hangman.obj.skip_puzzle_row)
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="'--puzzles'")
 
 
 @cli.command('title')
@@ -235,7 +307,7 @@ def ask_user(hangman):
             choice = None
             continue
 
-        if ord(choice) not in range(ord('a'), ord('z') + 1):
+        if not hangman_puzzles.valid_letter(choice):
             hangman.obj.styled_echo("Type a letter from A to Z!", fg="red")
             hangman.invoke(
                 say,
@@ -286,7 +358,8 @@ def setup_game(hangman, hide_answer):
         hangman.obj.answer = hangman.obj.prompt(' ', hide_input=hide_answer)
 
     # Set up the clue
-    if hangman.obj.clue is None:
+    # (puzzles from --puzzles have an answer_mask; a missing clue there means no clue, so don't ask)
+    if hangman.obj.clue is None and hangman.obj.answer_mask is None:
         hangman.obj.new_line()
         clue = hangman.obj.prompt('Clue?', default='', show_default=False)
         if clue:
@@ -305,8 +378,32 @@ def setup_game(hangman, hide_answer):
 def run(hangman, shh_answer):
     """
     Executes the main program loop
+    With --puzzles, plays every puzzle in the file, one after another
     """
+    if hangman.obj.puzzles is None:
+        play_game(hangman, shh_answer)
+        return
+
+    for player, answer, clue, answer_mask in hangman.obj.puzzles:
+        hangman.obj.player_name = player
+        hangman.obj.answer = answer
+        hangman.obj.clue = clue
+        hangman.obj.answer_mask = answer_mask
+        play_game(hangman, shh_answer)
+
+    # tell the teacher which rows were left out, now that no game will clear the screen
+    if hangman.obj.skipped_count:
+        hangman.obj.echo_red("Skipped {} row(s) of the puzzle file:".format(hangman.obj.skipped_count), err=True)
+        for line in hangman.obj.skipped_rows:
+            hangman.obj.echo_red("  " + line, err=True)
+        if hangman.obj.skipped_count > len(hangman.obj.skipped_rows):
+            hangman.obj.echo_red("  ...and {} more".format(hangman.obj.skipped_count - len(hangman.obj.skipped_rows)), err=True)
 
+
+def play_game(hangman, shh_answer):
+    """
+    Plays one game, from setup until the player wins or loses
+    """
     hangman.obj.clear_screen()   # blanks the screen
     hangman.invoke(setup_game, hide_answer=shh_answer)   #
     over = False
@@ -329,6 +426,7 @@ def run(hangman, shh_answer):
 
         if hangman.obj.is_solved():
             hangman.obj.echo_yellow('!!!!! YOU WON !!!!!')
+            hangman.obj.record_game(won=True)
             hangman.invoke(
                 say, what=hangman.obj.answer.split(' ')    # break up the answer into chunks of words with String.split()
             )
@@ -368,6 +466,7 @@ def run(hangman, shh_answer):
             # check if we lost
             if hangman.obj.num_errors == 6:
                 hangman.obj.echo_red("HA!")
+                hangman.obj.record_game(won=False)
                 hangman.invoke(
                     say, what="Ha, you lose"
                 )
@@ -398,3 +497,46 @@ def run(hangman, shh_answer):
             hangman.invoke(
                 say, what="Yes!"
             )
+
+
+@cli.command('stats')
+@add_option('--player', default=None, help="Show the totals for just this player")
+@add_option('--limit', default=10, help="How many words to show")
+@pass_hangman
+def stats(hangman, player, limit):
+    """
+    Shows the hardest words, or the totals for one player
+    """
+    if hangman.obj.scores is None:
+        return
+
+    if player:
+        row = hangman.obj.scores.player(player)
+        if row is None:
+            hangman.obj.echo_red("No games saved for " + player)
+            return
+        name, games, wins, errors = row
+        hangman.obj.echo_yellow(name)
+        hangman.obj.echo("Games: {}  Wins: {}  Losses: {}  Errors: {}".format(games, wins, games - wins, errors))
+        return
+
+    hangman.obj.echo_yellow("Hardest words")
+    for answer, games, losses, errors in hangman.obj.scores.hardest_words(limit):
+        hangman.obj.echo("{:<30} lost {} of {} games, {:.1f} errors per game".format(
+            answer, losses, games, errors / games
+        ))
+
+
+@cli.command('leaderboard')
+@add_option('--limit', default=10, help="How many players to show")
+@pass_hangman
+def leaderboard(hangman, limit):
+    """
+    Shows the players with the most wins
+    """
+    if hangman.obj.scores is None:
+        return
+
+    hangman.obj.echo_yellow("Leaderboard")
+    for place, (player, games, wins, errors) in enumerate(hangman.obj.scores.leaderboard(limit), start=1):
+        hangman.obj.echo("{:>3}. {:<20} {} wins in {} games".format(place, player, wins, games))
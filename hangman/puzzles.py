@@ -0,0 +1,182 @@
+"""
+Loads many puzzles from one file, so a whole term's games can be played in a row
+
+The file is either CSV (player, answer, clue on each row)
+or JSONL (one {"player": ..., "answer": ..., "clue": ...} object per line)
+
+Each step below is a generator: it takes one row, works on it, and passes it on
+That way only one row is in memory at a time, no matter how big the file is
+(the one exception is deduplicate, which remembers a number for each new puzzle)
+"""
+
+import csv
+import hashlib     # hashlib: turns a row into a short fingerprint for spotting repeats
+import json
+
+from hangman.scores import player_key
+
+HEADER = ['player', 'answer', 'clue']
+
+
+def valid_letter(choice):
+    """
+    The same rule that ask_user uses: just one letter from a to z
+    """
+    return len(choice) == 1 and ord(choice) in range(ord('a'), ord('z') + 1)
+
+
+def letter_mask(word):
+    """
+    Turns the letters of a word into a number, one bit for each letter a to z
+    Spaces (and anything else that is not a letter) are skipped
+    """
+    mask = 0
+    for letter in word.lower():
+        if valid_letter(letter):
+            mask |= 1 << (ord(letter) - ord('a'))
+    return mask
+
+
+def file_format(path):
+    """
+    'jsonl' or 'csv', depending on the file name
+    A .json file is usually one big list, which we cannot stream, so it is refused
+    """
+    name = path.lower()
+    if name.endswith('.jsonl'):
+        return 'jsonl'
+    if name.endswith('.json'):
+        raise ValueError("{} looks like a JSON list; use JSONL (one puzzle object per line) or CSV".format(path))
+    return 'csv'
+
+
+def is_utf8(text):
+    """
+    Bytes that are not UTF-8 are read in as 'surrogates' (see open() below),
+    which cannot be turned back into UTF-8, so this finds them
+    """
+    try:
+        text.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def read_rows(path, on_error):
+    """
+    Yields (line_number, [player, answer, clue]) for every row in the file
+    on_error is called with (line_number, reason) for each row that cannot be read
+
+    utf-8-sig drops the byte order mark that Excel puts at the start of a CSV
+    surrogateescape means a bad byte spoils only its own row, not the whole file
+    """
+    with open(path, newline='', encoding='utf-8-sig', errors='surrogateescape') as infile:
+        if file_format(path) == 'jsonl':
+            for line_number, line in enumerate(infile, start=1):
+                if not line.strip():
+                    continue
+                if not is_utf8(line):
+                    on_error(line_number, "is not valid UTF-8")
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    on_error(line_number, "is not valid JSON")
+                    continue
+                if not isinstance(row, dict):
+                    on_error(line_number, "has to be an object with player, answer and clue")
+                    continue
+                yield line_number, [row.get(key) for key in HEADER]
+        else:
+            reader = csv.reader(infile)
+            first = True
+            while True:
+                line_number = reader.line_num + 1   # where the next row starts
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    break
+                except csv.Error as error:
+                    on_error(line_number, str(error))
+                    if reader.line_num < line_number:
+                        # the reader could not move past the problem, so give up on the file
+                        on_error(line_number, "cannot read any further")
+                        break
+                    continue
+                if not row:
+                    continue
+                if first:
+                    first = False
+                    if [cell.strip().lower() for cell in row] == HEADER:
+                        continue   # skip the header row
+                if not all(is_utf8(cell) for cell in row):
+                    on_error(line_number, "is not valid UTF-8")
+                    continue
+                yield line_number, row
+
+
+def validate(rows, on_error):
+    """
+    Only passes on rows that can be played
+    on_error is called with (line_number, reason) for each row that is skipped
+    """
+    for line_number, row in rows:
+        if len(row) not in (2, 3):
+            on_error(line_number, "needs player, answer and clue")
+            continue
+        player, answer, clue = (list(row) + [None])[:3]
+        if player is not None and not isinstance(player, str):
+            on_error(line_number, "player has to be text")
+            continue
+        if not player or not player.strip():
+            on_error(line_number, "player is missing")
+            continue
+        if answer is not None and not isinstance(answer, str):
+            on_error(line_number, "answer has to be text")
+            continue
+        if not answer or not answer.strip():
+            on_error(line_number, "answer is missing")
+            continue
+        if not all(valid_letter(letter) for letter in answer.lower().replace(' ', '')):
+            on_error(line_number, "answer can only have letters from A to Z")
+            continue
+        if clue is not None and not isinstance(clue, str):
+            on_error(line_number, "clue has to be text")
+            continue
+        yield player.strip(), answer.strip(), (clue or '').strip() or None
+
+
+def deduplicate(puzzles):
+    """
+    Skips puzzles we have already seen
+    Case does not matter anywhere in the row, and players are matched the same
+    way as on the leaderboard (see hangman.scores.player_key)
+
+    We remember a 64 bit number for each new puzzle, not the whole row
+    In CPython that is about 70 bytes per puzzle (the int plus its place in the set),
+    so a million different puzzles take roughly 70 MB
+    """
+    seen = set()
+    for player, answer, clue in puzzles:
+        key = '\0'.join([player_key(player).lower(), answer.lower(), (clue or '').lower()]).encode('utf-8')
+        fingerprint = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        yield player, answer, clue
+
+
+def add_masks(puzzles):
+    """
+    Works out each answer's letter mask once, before the game starts
+    """
+    for player, answer, clue in puzzles:
+        yield player, answer, clue, letter_mask(answer)
+
+
+def load(path, on_error):
+    """
+    Yields (player, answer, clue, answer_mask) for each good, new puzzle in the file
+    """
+    file_format(path)   # refuse a .json file now, not halfway through the games
+    return add_masks(deduplicate(validate(read_rows(path, on_error), on_error)))
@@ -0,0 +1,214 @@
+"""
+Keeps a record of every finished game in a local SQLite database
+We use it to make leaderboards and to find the hardest words
+
+Three tables:
+    games: one row per finished game
+    player_stats: running totals for each player
+    answer_stats: running totals for each answer
+The totals are updated at the same time as the game is saved, so reports
+never have to add up the whole games table
+"""
+
+import logging     # logging: reports games that could not be saved
+import os
+import queue       # queue: lets the game hand results to the writer safely
+import sqlite3     # sqlite3: a small database that lives in a single file
+import threading   # threading: lets us save games in the background
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.hangman.sqlite3')
+BATCH_SIZE = 500   # most games written in one transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    num_errors INTEGER NOT NULL,
+    guesses TEXT NOT NULL,
+    won INTEGER NOT NULL,
+    played_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answer_stats (
+    answer TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_stats_wins ON player_stats (wins DESC, games);
+CREATE INDEX IF NOT EXISTS answer_stats_loss_rate
+    ON answer_stats ((losses * 1.0 / games) DESC, errors DESC);
+"""
+
+INSERT_GAME = """
+INSERT INTO games (player, answer, num_errors, guesses, won) VALUES (?, ?, ?, ?, ?)
+"""
+
+UPSERT_PLAYER = """
+INSERT INTO player_stats (player, games, wins, errors) VALUES (?, 1, ?, ?)
+ON CONFLICT (player) DO UPDATE SET
+    games = games + 1,
+    wins = wins + excluded.wins,
+    errors = errors + excluded.errors
+"""
+
+UPSERT_ANSWER = """
+INSERT INTO answer_stats (answer, games, losses, errors) VALUES (?, 1, ?, ?)
+ON CONFLICT (answer) DO UPDATE SET
+    games = games + 1,
+    losses = losses + excluded.losses,
+    errors = errors + excluded.errors
+"""
+
+_STOP = object()   # put on the queue to tell the writer to finish up
+
+log = logging.getLogger(__name__)
+
+
+def player_key(name):
+    """
+    The name a player is saved under
+    Matches what setup_game does with a typed name, so "ann" and "Ann" are one player
+    """
+    return ' '.join(name.split()).title()
+
+
+def connect(path):
+    """
+    Opens the database in WAL mode, so reading reports does not block saving games
+    """
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ScoreStore(object):
+    """
+    Saves finished games from a background thread
+    Games wait on a queue, and the writer saves as many as it can
+    in one transaction, which is much faster than one commit per game
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        connect(path).close()   # make the tables now, so reports work straight away
+        self.pending = queue.Queue()
+        self.failed = 0      # how many games could not be saved
+        self.error = None    # the last reason a batch could not be saved
+        self.writer = threading.Thread(target=self.write_forever, daemon=True)
+        self.writer.start()
+
+    def record(self, player, answer, num_errors, guesses, won):
+        """
+        Queues one finished game, returns without waiting for the disk
+        """
+        self.pending.put((player_key(player), answer.lower(), num_errors, guesses, int(bool(won))))
+
+    def write_forever(self):
+        """
+        Runs in the background until close() is called
+        If a batch cannot be saved we count it, log it and carry on,
+        so the queue is always emptied and close() never hangs
+        """
+        connection = None
+        try:
+            done = False
+            while not done:
+                batch = [self.pending.get()]   # wait for at least one game
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.pending.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in batch:
+                    done = True
+                    batch = [game for game in batch if game is not _STOP]
+                if not batch:
+                    continue
+                try:
+                    if connection is None:
+                        connection = connect(self.path)
+                    self.write_batch(connection, batch)
+                except Exception as error:
+                    self.failed += len(batch)
+                    self.error = error
+                    log.error("Could not save %d games to %s: %s", len(batch), self.path, error)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    @staticmethod
+    def write_batch(connection, batch):
+        with connection:   # one transaction for the whole batch
+            connection.executemany(INSERT_GAME, batch)
+            connection.executemany(
+                UPSERT_PLAYER,
+                [(player, won, num_errors) for player, _, num_errors, _, won in batch]
+            )
+            connection.executemany(
+                UPSERT_ANSWER,
+                [(answer, 1 - won, num_errors) for _, answer, num_errors, _, won in batch]
+            )
+
+    def close(self):
+        """
+        Waits for every queued game to be saved
+        Returns how many games could not be saved (see self.error for why)
+        """
+        if self.writer.is_alive():
+            self.pending.put(_STOP)
+            self.writer.join()
+        # anything still queued was never written
+        while True:
+            try:
+                if self.pending.get_nowait() is not _STOP:
+                    self.failed += 1
+            except queue.Empty:
+                break
+        return self.failed
+
+    def query(self, sql, params=()):
+        connection = connect(self.path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def leaderboard(self, limit=10):
+        """
+        Players with the most wins: (player, games, wins, errors)
+        """
+        return self.query(
+            'SELECT player, games, wins, errors FROM player_stats '
+            'ORDER BY wins DESC, games LIMIT ?',
+            (limit,)
+        )
+
+    def hardest_words(self, limit=10):
+        """
+        Answers that are lost the most often: (answer, games, losses, errors)
+        """
+        return self.query(
+            'SELECT answer, games, losses, errors FROM answer_stats '
+            'ORDER BY (losses * 1.0 / games) DESC, errors DESC LIMIT ?',
+            (limit,)
+        )
+
+    def player(self, name):
+        """
+        Totals for one player: (player, games, wins, errors), or None
+        """
+        rows = self.query(
+            'SELECT player, games, wins, errors FROM player_stats WHERE player = ?',
+            (player_key(name),)
+        )
+        return rows[0] if rows else None
@@ -0,0 +1,42 @@
+"""
+Plays games through the command line, the way a player would
+"""
+
+import shutil
+
+import click
+from click.testing import CliRunner
+
+import hangman.cli
+from hangman.cli import cli
+
+
+def play(monkeypatch, tmp_path, args, keys):
+    # no speaking, no pauses, and a terminal size that works on every click version
+    monkeypatch.setattr(hangman.cli.subprocess, 'run', lambda *args, **kwargs: None)
+    monkeypatch.setattr(hangman.cli.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(click, 'get_terminal_size', shutil.get_terminal_size, raising=False)
+    database = str(tmp_path / 'scores.db')
+    return CliRunner().invoke(cli, ['--database', database] + args + ['run'], input=keys)
+
+
+def test_puzzle_without_a_clue_does_not_ask_for_one(monkeypatch, tmp_path):
+    puzzles = tmp_path / 'puzzles.csv'
+    puzzles.write_text('Ann,ox,\n')
+
+    result = play(monkeypatch, tmp_path, ['--puzzles', str(puzzles)], 'o\nx\n\n')
+
+    assert result.exit_code == 0, result.output
+    assert 'Clue?' not in result.output
+    assert 'Clue:' not in result.output
+    assert 'YOU WON' in result.output
+
+
+def test_setup_and_puzzles_together_are_refused(monkeypatch, tmp_path):
+    puzzles = tmp_path / 'puzzles.csv'
+    puzzles.write_text('Ann,ox,farm\n')
+
+    result = play(monkeypatch, tmp_path, ['--setup', 'Bob', 'cat', 'pet', '--puzzles', str(puzzles)], '')
+
+    assert result.exit_code == 2
+    assert 'not both' in result.output
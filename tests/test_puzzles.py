@@ -0,0 +1,90 @@
+"""
+Checks that puzzle files are read, checked and deduplicated
+"""
+
+import pytest
+
+from hangman.puzzles import letter_mask, load
+
+
+def load_all(path):
+    errors = []
+    puzzles = list(load(str(path), on_error=lambda line_number, reason: errors.append(line_number)))
+    return puzzles, errors
+
+
+def test_excel_csv_with_byte_order_mark(tmp_path):
+    path = tmp_path / 'puzzles.csv'
+    path.write_bytes(b'\xef\xbb\xbfplayer,answer,clue\r\nAnn,cat,pet\r\n')
+
+    puzzles, errors = load_all(path)
+    assert puzzles == [('Ann', 'cat', 'pet', letter_mask('cat'))]
+    assert errors == []
+
+
+def test_header_after_blank_lines_is_skipped(tmp_path):
+    path = tmp_path / 'puzzles.csv'
+    path.write_text('\n\nplayer,answer,clue\nAnn,big dog,\n')
+
+    puzzles, errors = load_all(path)
+    assert puzzles == [('Ann', 'big dog', None, letter_mask('bigdog'))]
+    assert errors == []
+
+
+def test_duplicates_are_dropped(tmp_path):
+    path = tmp_path / 'puzzles.csv'
+    path.write_text('Ann,cat,pet\nann,CAT,Pet\nAnn,cat,animal\n')
+
+    puzzles, errors = load_all(path)
+    assert [puzzle[:3] for puzzle in puzzles] == [('Ann', 'cat', 'pet'), ('Ann', 'cat', 'animal')]
+
+
+def test_bad_rows_are_reported_and_skipped(tmp_path):
+    path = tmp_path / 'puzzles.csv'
+    path.write_bytes(
+        b'Ann,"c\nat",pet\n'                    # lines 1-2: not A to Z
+        b'Bob,dog,' + b'y' * 200000 + b'\n'     # line 3: field too large
+        b'Cid,o\xffx,z\n'                       # line 4: not UTF-8
+        b'Dee,,z\n'                             # line 5: no answer
+        b'Eve\n'                                # line 6: too few fields
+        b'Fay,ox,farm\n'
+    )
+
+    puzzles, errors = load_all(path)
+    assert [puzzle[:3] for puzzle in puzzles] == [('Fay', 'ox', 'farm')]
+    assert errors == [1, 3, 4, 5, 6]
+
+
+def test_jsonl_rows(tmp_path):
+    path = tmp_path / 'puzzles.jsonl'
+    path.write_bytes(
+        b'{"player": "Ann", "answer": "ox", "clue": "farm"}\n'
+        b'not json\n'
+        b'[1, 2]\n'
+        b'{"player": "Bob", "answer": "ox"}\n'
+    )
+
+    puzzles, errors = load_all(path)
+    assert [puzzle[:3] for puzzle in puzzles] == [('Ann', 'ox', 'farm'), ('Bob', 'ox', None)]
+    assert errors == [2, 3]
+
+
+def test_json_file_is_refused(tmp_path):
+    path = tmp_path / 'puzzles.json'
+    path.write_text('[]')
+
+    with pytest.raises(ValueError):
+        load(str(path), on_error=None)
+
+
+def test_jsonl_fields_that_are_not_text(tmp_path):
+    path = tmp_path / 'puzzles.jsonl'
+    path.write_text(
+        '{"player": "Ann", "answer": 42}\n'
+        '{"player": ["a"], "answer": "ox"}\n'
+        '{"answer": "ox"}\n'
+    )
+    reasons = []
+
+    assert list(load(str(path), on_error=lambda line_number, reason: reasons.append(reason))) == []
+    assert reasons == ["answer has to be text", "player has to be text", "player is missing"]
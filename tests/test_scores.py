@@ -0,0 +1,64 @@
+"""
+Checks that finished games are saved, and that the running totals add up
+"""
+
+from hangman.scores import ScoreStore, connect
+
+
+def totals_from_games(path):
+    connection = connect(path)
+    try:
+        players = connection.execute(
+            'SELECT player, COUNT(*), SUM(won), SUM(num_errors) FROM games GROUP BY player'
+        ).fetchall()
+        answers = connection.execute(
+            'SELECT answer, COUNT(*), SUM(1 - won), SUM(num_errors) FROM games GROUP BY answer'
+        ).fetchall()
+        stored_players = connection.execute('SELECT player, games, wins, errors FROM player_stats').fetchall()
+        stored_answers = connection.execute('SELECT answer, games, losses, errors FROM answer_stats').fetchall()
+    finally:
+        connection.close()
+    return sorted(players), sorted(stored_players), sorted(answers), sorted(stored_answers)
+
+
+def test_close_saves_every_queued_game(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    store = ScoreStore(path, batch_size=7)   # small batches, so several transactions are used
+    for i in range(100):
+        store.record('player{}'.format(i % 5), 'word{}'.format(i % 3), i % 6, 'abc', i % 2)
+
+    assert store.close() == 0
+    assert store.query('SELECT COUNT(*) FROM games') == [(100,)]
+
+
+def test_totals_match_the_games_table(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    store = ScoreStore(path)
+    for i in range(50):
+        store.record('player{}'.format(i % 4), 'Word{}'.format(i % 7), i % 6, 'xyz', i % 3 == 0)
+    store.close()
+
+    players, stored_players, answers, stored_answers = totals_from_games(path)
+    assert players == stored_players
+    assert answers == stored_answers
+
+
+def test_player_names_are_one_player_whatever_the_case(tmp_path):
+    store = ScoreStore(str(tmp_path / 'scores.db'))
+    store.record('ann', 'cat', 1, 'cat', True)
+    store.record(' Ann ', 'cat', 2, 'xyz', False)
+    store.close()
+
+    assert store.leaderboard() == [('Ann', 2, 1, 3)]
+    assert store.player('ANN') == ('Ann', 2, 1, 3)
+
+
+def test_failed_batch_is_counted_and_writer_keeps_going(tmp_path):
+    store = ScoreStore(str(tmp_path / 'scores.db'), batch_size=1)
+    store.record('ann', 'cat', 0, 'cat', True)
+    store.pending.put((None, 'cat', 0, 'cat', 1))   # breaks NOT NULL, so this batch fails
+    store.record('bob', 'dog', 0, 'dog', True)
+
+    assert store.close() == 1
+    assert store.error is not None
+    assert sorted(row[0] for row in store.leaderboard()) == ['Ann', 'Bob']